@@ -141,25 +141,7 @@ class Bagl(GraphicLibrary):
             else:
                 height = self.SCREEN_HEIGHT - y
 
-        YX = (y//8)*self.SCREEN_WIDTH + x
-        YXlinemax = YX + width
-        xx = x
-        requested_x = x
-
-        i = width * height
-        while i > 0:
-            i -= 1
-            self.fb.draw_point(xx, y, color)
-            YX += 1
-            xx += 1
-            if YX >= YXlinemax:
-                y += 1
-                height -= 1
-                YX = (y // 8) * self.SCREEN_WIDTH + x
-                YXlinemax = YX + width
-                xx = requested_x
-            if height == 0:
-                break
+        self.fb.fill_rect(x, y, width, height, color)
 
     @staticmethod
     def _compute_line_width(font_id: int, width: int, text: bytes) -> int:
@@ -1,6 +1,8 @@
 from __future__ import annotations
 
 import io
+import selectors
+from array import array
 from abc import ABC, abstractmethod
 try:
     from functools import cache
@@ -11,12 +13,14 @@ except ImportError:
 from PIL import Image
 from socket import socket
 from threading import Lock
-from typing import Any, Dict, IO, List, Optional, Tuple, Union
+from typing import Any, Callable, Dict, IO, Iterator, List, Optional, Tuple, Union, TYPE_CHECKING
 
 from speculos.observer import TextEvent
-from .struct import DisplayArgs, MODELS, Pixel, ServerArgs
+from .struct import DisplayArgs, MODELS, ServerArgs
 
-PixelColorMapping = Dict[Pixel, int]
+if TYPE_CHECKING:
+    # .vnc imports this module
+    from .vnc import VNC
 
 
 class IODevice(ABC):
@@ -51,6 +55,41 @@ class IODevice(ABC):
         pass
 
 
+class DeviceSelector:
+    """
+    Watches `IODevice` instances through a single selector (epoll, kqueue...), so a notifier can
+    handle all the ready devices at once.
+    """
+
+    def __init__(self) -> None:
+        self._selector = selectors.DefaultSelector()
+
+    def fileno(self) -> int:
+        """
+        Returns the file descriptor of the selector, readable when a watched device is
+        """
+        return self._selector.fileno()
+
+    def enable(self, device: IODevice) -> None:
+        if device.fileno not in self._selector.get_map():
+            self._selector.register(device.fileno, selectors.EVENT_READ, device)
+
+    def disable(self, fd: int) -> None:
+        # Takes the fd rather than the device, whose file may already be closed
+        if fd in self._selector.get_map():
+            self._selector.unregister(fd)
+
+    def ready_devices(self) -> Iterator[IODevice]:
+        """
+        Yields the devices ready to be read. Handling a device may disable, remove or add others:
+        these changes apply to the devices not yielded yet.
+        """
+        for key, _events in self._selector.select(0):
+            # A new registration, even for the same fd, gets a new key: stale events are skipped
+            if self._selector.get_map().get(key.fd) is key:
+                yield key.data
+
+
 COLORS: Dict[str, int] = {
     'LAGOON_BLUE': 0x7ebab5,
     'JADE_GREEN': 0xb9ceac,
@@ -79,8 +118,6 @@ class FrameBuffer:
     }
 
     def __init__(self, model: str):
-        self.pixels: PixelColorMapping = {}
-        self.screenshot_pixels: PixelColorMapping = {}
         self.screenshot_pixels_lock = Lock()
         self.default_color = 0
         self.draw_default_color = False
@@ -91,22 +128,157 @@ class FrameBuffer:
         self.model = model
         self.current_screen_size = MODELS[model].screen_size
         self._width, self._height = MODELS[model].screen_size
+        # RGB content of the screenshot, updated in place
+        self.screenshot_data = bytearray(3 * self._width * self._height)
+        # There are only a handful of colors on a given screen: memoize their RGB encoding
+        self._rgb_bytes: Dict[int, bytes] = {}
+
+        # Pixels drawn since the last redraw, stored as parallel arrays of at
+        # most one entry per screen pixel. `_dirty` flags every screen offset
+        # (y * width + x) having an entry, `_slots` gives its index (the value
+        # is stale for offsets which are not dirty).
+        size = self._width * self._height
+        self._xs = array('H', [0]) * size
+        self._ys = array('H', [0]) * size
+        self._cols = array('I', [0]) * size
+        self._slots = array('I', [0]) * size
+        self._dirty = bytearray(size)
+        self._clean = bytes(size)
+        self._n = 0
+        # Bounding box of the pixels drawn since the last `take_dirty_rect`
+        self._dirty_x0: int = self._width
+        self._dirty_y0: int = self._height
+        self._dirty_x1: int = -1
+        self._dirty_y1: int = -1
+
+    @property
+    def _has_fixed_colors(self) -> bool:
+        # There are only 2 colors on the Nano S and the Nano X
+        return self.model != 'stax' and self.model != 'flex' and self.model in FrameBuffer.COLORS
 
     @cache
     def check_color(self, color: int) -> int:
-        # There are only 2 colors on the Nano S and the Nano X but the one
-        # passed in argument isn't always valid. Fix it here.
-        if self.model != 'stax' and self.model != 'flex':
-            if color != 0x000000:
-                color = FrameBuffer.COLORS.get(self.model, color)
+        # The color passed in argument isn't always valid on models with fixed
+        # colors. Fix it here.
+        if self._has_fixed_colors and color != 0x000000:
+            color = FrameBuffer.COLORS[self.model]
         return color
 
+    @property
+    def fixed_colors(self) -> Optional[List[int]]:
+        """
+        Returns every color `check_color` can return, if the model only has a fixed few of them
+        """
+        if not self._has_fixed_colors:
+            return None
+        return [0x000000, FrameBuffer.COLORS[self.model]]
+
+    def _set_pixel(self, x: int, y: int, color: int) -> None:
+        if 0 <= x < self._width and 0 <= y < self._height:
+            offset = y * self._width + x
+            if self._dirty[offset]:
+                slot = self._slots[offset]
+            else:
+                slot = self._n
+                self._dirty[offset] = 1
+                self._slots[offset] = slot
+                self._xs[slot] = x
+                self._ys[slot] = y
+                self._n = slot + 1
+                if x < self._dirty_x0:
+                    self._dirty_x0 = x
+                if x > self._dirty_x1:
+                    self._dirty_x1 = x
+                if y < self._dirty_y0:
+                    self._dirty_y0 = y
+                if y > self._dirty_y1:
+                    self._dirty_y1 = y
+            self._cols[slot] = color
+
+    def _fill_rect(self, x0: int, y0: int, width: int, height: int, color: int) -> None:
+        # Bulk version of `_set_pixel`: clip once, then avoid any attribute
+        # lookup or method call per pixel.
+        x1 = min(x0 + width, self._width)
+        y1 = min(y0 + height, self._height)
+        x0 = max(x0, 0)
+        y0 = max(y0, 0)
+        if x0 >= x1 or y0 >= y1:
+            return
+
+        dirty, slots, xs, ys, cols = self._dirty, self._slots, self._xs, self._ys, self._cols
+        n = self._n
+        for y in range(y0, y1):
+            line = y * self._width
+            for x in range(x0, x1):
+                if dirty[line + x]:
+                    slot = slots[line + x]
+                else:
+                    slot = n
+                    dirty[line + x] = 1
+                    slots[line + x] = slot
+                    xs[slot] = x
+                    ys[slot] = y
+                    n += 1
+                cols[slot] = color
+        self._n = n
+
+        self._dirty_x0 = min(self._dirty_x0, x0)
+        self._dirty_y0 = min(self._dirty_y0, y0)
+        self._dirty_x1 = max(self._dirty_x1, x1 - 1)
+        self._dirty_y1 = max(self._dirty_y1, y1 - 1)
+
+    def _pending_arrays(self) -> Tuple[array, array, array]:
+        n = self._n
+        return self._xs[:n], self._ys[:n], self._cols[:n]
+
+    def _pending_pixels(self) -> Iterator[Tuple[int, int, int]]:
+        return zip(*self._pending_arrays())
+
+    @property
+    def has_pending_pixels(self) -> bool:
+        return self._n != 0
+
+    @property
+    def needs_flush(self) -> bool:
+        return self._n != 0 or self.draw_default_color
+
+    def _reset_pixels(self) -> None:
+        # A single in-place copy, no allocation
+        self._dirty[:] = self._clean
+        self._n = 0
+
+    def _reset_dirty_rect(self) -> None:
+        self._dirty_x0 = self._width
+        self._dirty_y0 = self._height
+        self._dirty_x1 = -1
+        self._dirty_y1 = -1
+
+    def take_dirty_rect(self) -> Optional[Tuple[int, int, int, int]]:
+        """
+        Returns the (x, y, width, height) area drawn since the last call, or None if nothing was
+        drawn
+        """
+        if self.draw_default_color:
+            rect: Optional[Tuple[int, int, int, int]] = (0, 0, self._width, self._height)
+        elif self._dirty_x1 < 0:
+            rect = None
+        else:
+            rect = (self._dirty_x0, self._dirty_y0,
+                    self._dirty_x1 - self._dirty_x0 + 1, self._dirty_y1 - self._dirty_y0 + 1)
+        self._reset_dirty_rect()
+        return rect
+
     def draw_point(self, x: int, y: int, color: int) -> None:
-        self.pixels[(x, y)] = self.check_color(color)
+        self._set_pixel(x, y, self.check_color(color))
 
     def draw_horizontal_line(self, x0: int, y: int, width: int, color: int) -> None:
-        for x in range(x0, x0 + width):
-            self.pixels[(x, y)] = self.check_color(color)
+        self._fill_rect(x0, y, width, 1, self.check_color(color))
+
+    def fill_rect(self, x0: int, y0: int, width: int, height: int, color: int) -> None:
+        """
+        Draws a plain rectangle, without the screen clearing special case of `draw_rect`
+        """
+        self._fill_rect(x0, y0, width, height, self.check_color(color))
 
     def draw_rect(self, x0: int, y0: int, width: int, height: int, color: int) -> List[TextEvent]:
         color = self.check_color(color)
@@ -114,25 +286,18 @@ class FrameBuffer:
         if x0 == 0 and y0 == 0 and width == self._width and height == self._height:
             self.default_color = color
             self.draw_default_color = True
-            self.pixels = {}
+            self._reset_pixels()
             self.reset_screeshot_pixels = True
             return [TextEvent("", 0, 0, 0, 0, True)]
 
-        for x in range(x0, x0 + width):
-            for y in range(y0, y0 + height):
-                self.pixels[(x, y)] = color
-
+        self._fill_rect(x0, y0, width, height, color)
         return []
 
     def _get_image(self) -> bytes:
         # This call is made from the Speculos API thread
-        # Protect screenshot_pixels for concurrent Write during this Read
+        # Protect screenshot_data for concurrent Write during this Read
         with self.screenshot_pixels_lock:
-            data = bytearray(self.default_color.to_bytes(3, "big")) * self._width * self._height
-            for (x, y), color in self.screenshot_pixels.items():
-                pos = 3 * (y * self._width + x)
-                data[pos:pos + 3] = color.to_bytes(3, "big")
-        return bytes(data)
+            return bytes(self.screenshot_data)
 
     def _get_screenshot_iobytes_value(self) -> bytes:
         # Get the pixels object once, as it may be replaced during the loop.
@@ -146,14 +311,67 @@ class FrameBuffer:
     def take_screenshot(self) -> Tuple[Tuple[int, int], bytes]:
         return self.current_screen_size, self._get_image()
 
+    def _reset_screenshot(self) -> None:
+        # Must be called with screenshot_pixels_lock held
+        if self.reset_screeshot_pixels:
+            self.screenshot_data[:] = self.default_color.to_bytes(3, "big") * (self._width * self._height)
+            self.reset_screeshot_pixels = False
+
+    def _write_screenshot(self) -> Iterator[Tuple[int, int, int]]:
+        """
+        Writes the pending pixels to the screenshot, yielding each of them once written.
+        """
+        # Must be called with screenshot_pixels_lock held
+        self._reset_screenshot()
+        data = self.screenshot_data
+        rgb_bytes = self._rgb_bytes
+        width = self._width
+        for pixel in self._pending_pixels():
+            x, y, color = pixel
+            rgb = rgb_bytes.get(color)
+            if rgb is None:
+                rgb = rgb_bytes[color] = color.to_bytes(3, "big")
+            pos = 3 * (y * width + x)
+            data[pos:pos + 3] = rgb
+            yield pixel
+
     def update_screenshot(self) -> None:
         # This call is made from the MCU/Seproxyhal thread
-        # Protect screenshot_pixels for concurrent Read during this Write
+        # Protect screenshot_data for concurrent Read during this Write
         with self.screenshot_pixels_lock:
-            if self.reset_screeshot_pixels:
-                self.screenshot_pixels = {}
-                self.reset_screeshot_pixels = False
-            self.screenshot_pixels.update(self.pixels)
+            for _ in self._write_screenshot():
+                pass
+
+    def flush(self,
+              image: Optional[memoryview] = None,
+              stride: int = 0,
+              vnc: Optional[VNC] = None,
+              pixel_value: Optional[Callable[[int], int]] = None) -> None:
+        """
+        Writes the pending pixels to the screenshot, to the `image` scanlines (`stride` pixels per
+        line) and to the `vnc` server if given, walking them only once, then drops them.
+
+        `pixel_value` gives the value of a color in `image`, and is mandatory along with it.
+        """
+        if vnc is not None:
+            vnc.redraw(*self._pending_arrays(), self.default_color if self.draw_default_color else None)
+
+        if image is None:
+            self.update_screenshot()
+        else:
+            if pixel_value is None:
+                raise ValueError("pixel_value is mandatory to flush to an image")
+            # Only a few colors are drawn between two flushes
+            values: Dict[int, int] = {}
+            with self.screenshot_pixels_lock:
+                for x, y, color in self._write_screenshot():
+                    value = values.get(color)
+                    if value is None:
+                        value = values[color] = pixel_value(color)
+                    image[y * stride + x] = value
+
+        self._reset_pixels()
+        self.draw_default_color = False
 
     def update_public_screenshot(self) -> None:
         # Stax/Flex only
@@ -303,10 +521,7 @@ class DisplayNotifier(ABC):
     """
 
     def __init__(self, display_args: DisplayArgs, server_args: ServerArgs) -> None:
-        # TODO: this should be Dict[int, IODevice], but in QtScreen, it is
-        #       a QSocketNotifier, which has a completely different interface
-        #       and is not used in the same way in the mcu/screen.py module.
-        self.notifiers: Dict[int, Any] = {}
+        self.notifiers: Dict[int, IODevice] = {}
         self._server_args = server_args
         self._display_args = display_args
         self._display: Display
@@ -53,18 +53,11 @@ class HeadlessPaintWidget(FrameBuffer):
                _1: Optional[int] = None,
                _2: Optional[int] = None,
                _3: Optional[int] = None) -> bool:
-        if self.pixels or self.draw_default_color:
-            self._redraw()
-            self.pixels = {}
-            self.draw_default_color = False
+        if self.needs_flush:
+            self.flush(vnc=self.vnc)
             return True
         return False
 
-    def _redraw(self) -> None:
-        if self.vnc:
-            self.vnc.redraw(self.pixels, self.default_color)
-        self.update_screenshot()
-
 
 class HeadlessNotifier(DisplayNotifier):
 
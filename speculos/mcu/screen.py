@@ -1,16 +1,16 @@
 from __future__ import annotations
 
 from PyQt5.QtWidgets import QApplication, QWidget, QMainWindow
-from PyQt5.QtGui import QPainter, QColor, QPixmap
-from PyQt5.QtGui import QIcon, QKeyEvent, QMouseEvent
-from PyQt5.QtCore import QEvent, Qt, QSocketNotifier, QSettings, QRect
+from PyQt5.QtGui import QPainter, QColor, QImage, QPixmap, QPixmapCache
+from PyQt5.QtGui import QIcon, QKeyEvent, QMouseEvent, QPaintEvent
+from PyQt5.QtCore import QEvent, Qt, QPoint, QSocketNotifier, QSettings, QRect
 from PyQt5.sip import voidptr
-from typing import List, Optional
+from typing import Dict, List, Optional
 
 from speculos.observer import TextEvent
 from . import bagl
 from . import nbgl
-from .display import COLORS, Display, DisplayNotifier, FrameBuffer, GraphicLibrary, IODevice
+from .display import COLORS, DeviceSelector, Display, DisplayNotifier, FrameBuffer, GraphicLibrary, IODevice
 from .readerror import ReadError
 from .struct import DisplayArgs, MODELS, ServerArgs
 from .vnc import VNC
@@ -19,59 +19,126 @@ BUTTON_LEFT = 1
 BUTTON_RIGHT = 2
 DEFAULT_WINDOW_X = 10
 DEFAULT_WINDOW_Y = 10
+ICON_PATH = 'mcu/icon.png'
 
 
 class PaintWidget(FrameBuffer, QWidget):
+    """
+    Base class of the Qt screen widgets. As the pixel size is fixed for the whole run, the paint
+    path is specialized by `PaintWidget1x` and `PaintWidgetNx`.
+    """
+
     def __init__(self, parent, model: str, pixel_size: int, vnc: Optional[VNC] = None):
         QWidget.__init__(self, parent)
         FrameBuffer.__init__(self, model)
         self.pixel_size = pixel_size
-        self.mPixmap = QPixmap()
+        # Persistent backing store: pixels are written straight into its
+        # scanlines instead of going through QPainter one point at a time.
+        # `_pixel_values` maps colors to their value in these scanlines.
+        fixed_colors = self.fixed_colors
+        if fixed_colors is None:
+            self._image = QImage(self._width, self._height, QImage.Format_RGB32)
+            self._scanline_format = 'I'
+            self._pixel_values: Dict[int, int] = {}
+        else:
+            # Only a few colors (Nano models): store 8 bits color table indexes
+            # rather than 32 bits pixels.
+            self._image = QImage(self._width, self._height, QImage.Format_Indexed8)
+            self._image.setColorTable([0xff000000 | color for color in fixed_colors])
+            self._scanline_format = 'B'
+            self._pixel_values = {color: index for index, color in enumerate(fixed_colors)}
+        # Start blank, in the default color, like the screenshot
+        self._image.fill(self._pixel_value(self.default_color))
         self.vnc = vnc
-
-    def paintEvent(self, event: QEvent):
-        if self.pixels or self.draw_default_color:
-            pixmap = QPixmap(self.size() / self.pixel_size)
-            pixmap.fill(Qt.white)
-            painter = QPainter(pixmap)
-            painter.drawPixmap(0, 0, self.mPixmap)
-            self._redraw(painter)
-            self.mPixmap = pixmap
-            self.pixels = {}
-            self.draw_default_color = False
-
-        qp = QPainter(self)
-        copied_pixmap = self.mPixmap
-        if self.pixel_size != 1:
-            # Only call scaled if needed.
-            copied_pixmap = self.mPixmap.scaled(
-                self.mPixmap.width() * self.pixel_size,
-                self.mPixmap.height() * self.pixel_size)
-        qp.drawPixmap(0, 0, copied_pixmap)
+        # paintEvent always covers the whole requested area with the backing store: let Qt skip
+        # erasing the background beforehand.
+        self.setAttribute(Qt.WA_OpaquePaintEvent, True)
+        self.setAttribute(Qt.WA_NoSystemBackground, True)
 
     def update(self,  # type: ignore[override]
                x: Optional[int] = None,
                y: Optional[int] = None,
                w: Optional[int] = None,
                h: Optional[int] = None) -> bool:
-        if x and y and w and h:
-            QWidget.update(self, QRect(x, y, w, h))
-        else:
-            QWidget.update(self)
-        return self.pixels != {}
-
-    def _redraw(self, qp):
+        drawn = self.take_dirty_rect()
+        area = QRect(*drawn) if drawn is not None else QRect()
+        if x is not None and y is not None and w is not None and h is not None:
+            # The refreshed area is explicitly given (x or y may be 0)
+            area = QRect(x, y, w, h)
+        if not area.isEmpty():
+            self._refresh(area)
+        return self.has_pending_pixels
+
+    # Implemented by PaintWidget1x and PaintWidgetNx. As for `FrameBuffer.update`, it cannot be an
+    # `@abstractmethod`: QWidget and ABC derive from different metaclasses.
+    def _refresh(self, area: QRect) -> None:
+        """
+        Schedules a paint of `area`, given in screen coordinates
+        """
+        raise NotImplementedError()
+
+    def _pixel_value(self, color: int) -> int:
+        value = self._pixel_values.get(color)
+        if value is None:
+            if self._scanline_format != 'I':
+                # check_color only returns colors of the color table
+                raise ValueError(f"Color 0x{color:06x} is not in the {self.model} color table")
+            value = self._pixel_values[color] = 0xff000000 | color
+        return value
+
+    def _redraw(self):
         if self.draw_default_color:
-            qp.fillRect(0, 0, self._width, self._height, QColor.fromRgb(self.default_color))
-
-        for (x, y), color in self.pixels.items():
-            qp.setPen(QColor.fromRgb(color))
-            qp.drawPoint(x, y)
-
-        if self.vnc is not None:
-            self.vnc.redraw(self.pixels, self.default_color)
+            # Pixels can be filled with their raw value, no QColor needed
+            self._image.fill(self._pixel_value(self.default_color))
+
+        ptr = self._image.bits()
+        ptr.setsize(self._image.sizeInBytes())
+        with memoryview(ptr).cast(self._scanline_format) as scanlines:
+            self.flush(scanlines, self._image.bytesPerLine() // scanlines.itemsize, self.vnc, self._pixel_value)
+
+
+class PaintWidget1x(PaintWidget):
+    """
+    Screen widget for a pixel size of 1: the backing store is blitted as is.
+    """
+
+    def paintEvent(self, event: QPaintEvent):
+        # Nothing to flush (nor to send to VNC) when no pixel was drawn. The blit itself can't be
+        # skipped: Qt only asks for a paint when its backing store lacks this area (first show,
+        # update()...).
+        if self.needs_flush:
+            self._redraw()
+
+        # Only repaint the invalidated area
+        rect = event.rect()
+        QPainter(self).drawImage(rect, self._image, rect)
+
+    def _refresh(self, area: QRect) -> None:
+        QWidget.update(self, area)
+
+
+class PaintWidgetNx(PaintWidget):
+    """
+    Screen widget for a pixel size greater than 1: the backing store is upscaled while blitting.
+    """
+
+    def paintEvent(self, event: QPaintEvent):
+        # See PaintWidget1x.paintEvent
+        if self.needs_flush:
+            self._redraw()
+
+        # Only repaint the screen pixels covering the invalidated area
+        ps = self.pixel_size
+        rect = event.rect()
+        x0, y0 = rect.left() // ps, rect.top() // ps
+        src = QRect(x0, y0, rect.right() // ps - x0 + 1, rect.bottom() // ps - y0 + 1)
+        qp = QPainter(self)
+        qp.setRenderHint(QPainter.SmoothPixmapTransform, False)
+        qp.drawImage(QRect(x0 * ps, y0 * ps, src.width() * ps, src.height() * ps), self._image, src)
 
-        self.update_screenshot()
+    def _refresh(self, area: QRect) -> None:
+        ps = self.pixel_size
+        QWidget.update(self, QRect(area.x() * ps, area.y() * ps, area.width() * ps, area.height() * ps))
 
 
 class App(QMainWindow):
@@ -102,18 +169,10 @@ class App(QMainWindow):
         window_width = (self._width + box_size_x) * display.pixel_size
         window_height = (self._height + box_size_y) * display.pixel_size
 
-        # Be sure Window is FULLY visible in one of the available screens:
-        window_is_visible = False
-        for screen in qt_app.screens():
-            x1 = screen.geometry().x()
-            y1 = screen.geometry().y()
-            x2 = x1 + screen.geometry().width() - 1
-            y2 = y1 + screen.geometry().height() - 1
-
-            if window_x >= x1 and window_y >= y1 and (window_x + window_width - 1) <= x2 and \
-               (window_y + window_height - 1) <= y2:
-                window_is_visible = True
-                break   # No need to check other screens
+        # Be sure Window is FULLY visible in the screen holding its top-left corner:
+        target_screen = qt_app.screenAt(QPoint(window_x, window_y))
+        window_is_visible = target_screen is not None and \
+            target_screen.geometry().contains(QRect(window_x, window_y, window_width, window_height))
 
         # If the window is not FULLY visible, force default coordinates on current screen:
         if not window_is_visible:
@@ -134,13 +193,22 @@ class App(QMainWindow):
         self.setPalette(p)
 
         # Add paint widget and paint
-        self.widget = PaintWidget(self, display.model, display.pixel_size, server.vnc)
+        widget_class = PaintWidget1x if display.pixel_size == 1 else PaintWidgetNx
+        self.widget: PaintWidget = widget_class(self, display.model, display.pixel_size, server.vnc)
         self.widget.move(self.box_position_x * display.pixel_size, self.box_position_y * display.pixel_size)
         self.widget.resize(self._width * display.pixel_size, self._height * display.pixel_size)
-        self.setWindowIcon(QIcon('mcu/icon.png'))
+        self.setWindowIcon(QIcon(self._get_icon()))
         self.show()
         self._screen: Screen
 
+    @staticmethod
+    def _get_icon() -> QPixmap:
+        pixmap = QPixmapCache.find(ICON_PATH)
+        if pixmap is None or pixmap.isNull():
+            pixmap = QPixmap(ICON_PATH)
+            QPixmapCache.insert(ICON_PATH, pixmap)
+        return pixmap
+
     def set_screen(self, screen: Screen) -> None:
         self._screen = screen
 
@@ -211,6 +279,10 @@ class Screen(Display):
         return self._gl
 
     def _key_event(self, event: QKeyEvent, pressed) -> None:
+        # A held key generates release/press pairs flagged as auto-repeat: only forward the first
+        # press and the final release.
+        if event.isAutoRepeat():
+            return
         key = Qt.Key(event.key())
         if key in [Qt.Key_Left, Qt.Key_Right]:
             buttons = {Qt.Key_Left: BUTTON_LEFT, Qt.Key_Right: BUTTON_RIGHT}
@@ -242,6 +314,11 @@ class Screen(Display):
 class QtScreenNotifier(DisplayNotifier):
     def __init__(self, display_args: DisplayArgs, server_args: ServerArgs) -> None:
         self._qapp = QApplication([])
+        # A single QSocketNotifier watches the selector of every device: all the ready devices are
+        # then handled in one Qt callback.
+        self._devices = DeviceSelector()
+        self._notifier = QSocketNotifier(voidptr(self._devices.fileno()), QSocketNotifier.Read, self._qapp)
+        self._notifier.activated.connect(self._devices_can_read)
         super().__init__(display_args, server_args)
         self._set_display_class(Screen)
         self._app_widget = App(self._qapp, display_args, server_args)
@@ -255,21 +332,25 @@ class QtScreenNotifier(DisplayNotifier):
         except ReadError:
             self._app_widget.close()
 
+    def _devices_can_read(self, _fd) -> None:
+        for device in self._devices.ready_devices():
+            self._can_read(device)
+
     def add_notifier(self, device: IODevice) -> None:
-        n = QSocketNotifier(voidptr(device.fileno), QSocketNotifier.Read, self._qapp)
-        n.activated.connect(lambda _: self._can_read(device))
         assert device.fileno not in self.notifiers
-        self.notifiers[device.fileno] = n
+        self.notifiers[device.fileno] = device
+        self.enable_notifier(device.fileno)
 
     def enable_notifier(self, fd: int, enabled: bool = True) -> None:
-        n = self.notifiers[fd]
-        n.setEnabled(enabled)
+        if enabled:
+            self._devices.enable(self.notifiers[fd])
+        else:
+            self._devices.disable(fd)
 
     def remove_notifier(self, fd: int) -> None:
         # just in case
         self.enable_notifier(fd, False)
-        n = self.notifiers.pop(fd)
-        n.disconnect()
+        self.notifiers.pop(fd)
 
     def run(self):
         self._qapp.exec_()
@@ -50,7 +50,8 @@ class TextWidget(FrameBuffer):
         super().__init__(model)
         self.width = parent.width
         self.height = parent.height
-        self.previous_screen = 0
+        # 1 for every lit pixel, as pending pixels are dropped once applied
+        self.screen = bytearray(self._width * self._height)
 
         # ncurses stops the process if in the background
         if os.tcgetpgrp(sys.stdin.fileno()) != os.getpgrp():
@@ -68,15 +69,23 @@ class TextWidget(FrameBuffer):
         self.stdscr.keypad(True)  # interpret escape sequences generated by keypad and function keys
 
     def get_pixel(self, x, y):
-        color = self.pixels.get((x, y), 0)
-        return int(color != 0)
+        return self.screen[y * self._width + x]
 
     def update(self):
-        if self.pixels != self.previous_screen:
+        changed = False
+        if self.draw_default_color:
+            changed = any(self.screen)
+            self.screen[:] = self._clean
+        for x, y, color in self._pending_pixels():
+            offset = y * self._width + x
+            lit = int(color != 0)
+            if self.screen[offset] != lit:
+                self.screen[offset] = lit
+                changed = True
+        self.flush()
+        if changed:
             self._redraw()
-            self.previous_screen = self.pixels.copy()
-            return True
-        return False
+        return changed
 
     def _redraw(self):
         self.stdscr.clear()
@@ -96,7 +105,6 @@ class TextWidget(FrameBuffer):
         self.stdscr.addstr(0, 0, ' '*(self.width//2 + 2), curses.color_pair(2))
         self.stdscr.addstr(self.height//2+1, 0, ' '*(self.width//2 + 2), curses.color_pair(2))
         self.stdscr.refresh()
-        self.update_screenshot()
 
 
 class TextScreen(Display):
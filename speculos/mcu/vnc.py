@@ -9,9 +9,10 @@ import os
 import logging
 import subprocess
 import sys
+from array import array
 from typing import IO, Optional, Tuple
 
-from .display import DisplayNotifier, IODevice, PixelColorMapping
+from .display import DisplayNotifier, IODevice
 
 
 class VNC(IODevice):
@@ -23,6 +24,9 @@ class VNC(IODevice):
         self.logger = logging.getLogger("vnc")
 
         self._width, self._height = screen_size
+        # Coordinates of every screen pixel, used to clear the whole screen
+        self._all_xs = array('H', [x for x in range(self._width) for _ in range(self._height)])
+        self._all_ys = array('H', range(self._height)) * self._width
         path = os.path.dirname(os.path.realpath(__file__))
         server = os.path.join(path, '../resources/vnc_server')
         cmd = [server]
@@ -48,25 +52,41 @@ class VNC(IODevice):
         assert self.subprocess.stdout is not None
         return self.subprocess.stdout
 
-    def redraw(self, pixels: PixelColorMapping, default_color: int) -> None:
-        '''The framebuffer was updated, forward everything to the VNC server.'''
-
-        # int.to_bytes() is super slow, hence the manual encoding
-        buf = bytearray(self._width * self._height * 9)
-        i = 0
-        for x in range(0, self._width):
-            for y in range(0, self._height):
-                color = pixels.get((x, y), default_color)
-                buf[i + 0] = y & 0xff
-                buf[i + 1] = (y >> 8) & 0xff
-                buf[i + 2] = x & 0xff
-                buf[i + 3] = (x >> 8) & 0xff
-                buf[i + 4] = color & 0xff
-                buf[i + 5] = (color >> 8) & 0xff
-                buf[i + 6] = (color >> 16) & 0xff
-                buf[i + 7] = (color >> 24) & 0xff
-                buf[i + 8] = 0x0a
-                i += 9
+    @staticmethod
+    def _encode(xs: array, ys: array, colors: array) -> bytearray:
+        '''Encode pixels as draw events: y and x (u16), color (u32), then a newline.'''
+
+        if sys.byteorder != 'little':
+            xs, ys, colors = array(xs.typecode, xs), array(ys.typecode, ys), array(colors.typecode, colors)
+            for a in (xs, ys, colors):
+                a.byteswap()
+
+        # Interleave the raw array bytes with strided slices, rather than
+        # encoding pixels one by one in Python.
+        n = len(colors)
+        ys_bytes, xs_bytes, colors_bytes = ys.tobytes(), xs.tobytes(), colors.tobytes()
+        buf = bytearray(n * 9)
+        buf[0::9] = ys_bytes[0::2]
+        buf[1::9] = ys_bytes[1::2]
+        buf[2::9] = xs_bytes[0::2]
+        buf[3::9] = xs_bytes[1::2]
+        for i in range(4):
+            buf[4 + i::9] = colors_bytes[i::4]
+        buf[8::9] = b'\x0a' * n
+        return buf
+
+    def redraw(self, xs: array, ys: array, colors: array, default_color: Optional[int] = None) -> None:
+        '''
+        The framebuffer was updated, forward the updated pixels to the VNC server.
+
+        If `default_color` is given, the whole screen was first cleared with it.
+        '''
+
+        buf = bytearray()
+        if default_color is not None:
+            all_colors = array('I', [default_color]) * len(self._all_xs)
+            buf += self._encode(self._all_xs, self._all_ys, all_colors)
+        buf += self._encode(xs, ys, colors)
 
         assert self.subprocess.stdin is not None
         self.subprocess.stdin.write(buf)
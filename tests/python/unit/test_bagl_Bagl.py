@@ -0,0 +1,40 @@
+from unittest import TestCase
+
+from speculos.mcu.bagl import Bagl
+from speculos.mcu.display import FrameBuffer
+from speculos.mcu.struct import MODELS
+
+
+class TestBagl(TestCase):
+
+    def setUp(self):
+        self.fb = FrameBuffer('nanos')
+        self.width, self.height = MODELS['nanos'].screen_size
+        self.bagl = Bagl(self.fb, MODELS['nanos'].screen_size, 'nanos')
+        self.color = self.fb.check_color(0xffffff)
+
+    def drawn_points(self):
+        points = set()
+        for x, y, color in self.fb._pending_pixels():
+            self.assertEqual(color, self.color)
+            points.add((x, y))
+        return points
+
+    def test_draw_rect(self):
+        self.bagl._hal_draw_rect(0xffffff, 2, 3, 4, 2)
+        self.assertEqual(self.drawn_points(), {(x, y) for x in range(2, 6) for y in range(3, 5)})
+
+    def test_draw_rect_clipped_to_screen(self):
+        # Out-of-screen rectangles are extended to the screen edge, and their out-of-screen points
+        # dropped
+        self.bagl._hal_draw_rect(0xffffff, -2, 3, 4, 2)
+        self.assertEqual(self.drawn_points(), {(x, y) for x in range(self.width) for y in range(3, 5)})
+
+        self.fb._reset_pixels()
+        self.bagl._hal_draw_rect(0xffffff, self.width - 2, self.height - 1, 4, 3)
+        self.assertEqual(self.drawn_points(), {(self.width - 2, self.height - 1), (self.width - 1, self.height - 1)})
+
+    def test_draw_rect_out_of_screen(self):
+        self.bagl._hal_draw_rect(0xffffff, self.width + 1, 0, 4, 2)
+        self.bagl._hal_draw_rect(0xffffff, 0, self.height + 1, 4, 2)
+        self.assertEqual(self.drawn_points(), set())
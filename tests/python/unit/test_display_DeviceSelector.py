@@ -0,0 +1,95 @@
+import socket
+from typing import Callable, Optional
+from unittest import TestCase
+
+from speculos.mcu.display import DeviceSelector, IODevice
+
+
+class SocketDevice(IODevice):
+
+    def __init__(self, sock: socket.socket):
+        self.sock = sock
+
+    @property
+    def file(self) -> socket.socket:
+        return self.sock
+
+    def can_read(self, screen) -> None:
+        pass
+
+
+class TestDeviceSelector(TestCase):
+
+    def setUp(self):
+        self.selector = DeviceSelector()
+        self.sockets = []
+
+    def tearDown(self):
+        for sock in self.sockets:
+            sock.close()
+
+    def make_device(self, ready: bool = True) -> SocketDevice:
+        device, peer = socket.socketpair()
+        self.sockets += [device, peer]
+        if ready:
+            peer.send(b'x')
+        return SocketDevice(device)
+
+    def handle_ready_devices(self, on_device: Optional[Callable[[SocketDevice], None]] = None):
+        handled = []
+        for device in self.selector.ready_devices():
+            handled.append(device)
+            if on_device is not None:
+                on_device(device)
+        return handled
+
+    def test_ready_devices(self):
+        first, second, idle = self.make_device(), self.make_device(), self.make_device(ready=False)
+        for device in (first, second, idle):
+            self.selector.enable(device)
+        self.assertCountEqual(self.handle_ready_devices(), [first, second])
+
+    def test_disable_then_enable(self):
+        device = self.make_device()
+        self.selector.enable(device)
+        self.selector.disable(device.fileno)
+        self.assertEqual(self.handle_ready_devices(), [])
+        # Disabling twice is harmless
+        self.selector.disable(device.fileno)
+
+        self.selector.enable(device)
+        # Enabling twice is harmless
+        self.selector.enable(device)
+        self.assertEqual(self.handle_ready_devices(), [device])
+
+    def test_device_disabled_while_handling_another(self):
+        first, second = self.make_device(), self.make_device()
+        self.selector.enable(first)
+        self.selector.enable(second)
+
+        def disable_other(device):
+            self.selector.disable((second if device is first else first).fileno)
+
+        self.assertEqual(len(self.handle_ready_devices(disable_other)), 1)
+
+    def test_reused_fd_is_not_handled_with_stale_event(self):
+        first, second = self.make_device(), self.make_device()
+        self.selector.enable(first)
+        self.selector.enable(second)
+        replacements = []
+
+        def replace_other(device):
+            # The other device is removed and a new one gets its fd: the event selected for the
+            # removed device must not be handed to the new one
+            if replacements:
+                return
+            other = second if device is first else first
+            self.selector.disable(other.fileno)
+            replacement = SocketDevice(socket.socket(fileno=other.sock.detach()))
+            self.sockets.append(replacement.sock)
+            self.selector.enable(replacement)
+            replacements.append(replacement)
+
+        self.assertEqual(len(self.handle_ready_devices(replace_other)), 1)
+        # The new device is handled by the next selection
+        self.assertIn(replacements[0], self.handle_ready_devices())
@@ -0,0 +1,65 @@
+from unittest import TestCase
+
+from speculos.mcu.display import FrameBuffer
+from speculos.mcu.struct import MODELS
+
+
+class TestFrameBuffer(TestCase):
+
+    def setUp(self):
+        self.fb = FrameBuffer('stax')
+        self.width, self.height = MODELS['stax'].screen_size
+
+    def test_overdraw_keeps_one_entry_with_last_color(self):
+        self.fb.draw_point(3, 4, 0x111111)
+        self.fb.draw_point(3, 4, 0x222222)
+        self.fb.draw_horizontal_line(3, 4, 1, 0x333333)
+        self.fb.fill_rect(3, 4, 1, 1, 0x444444)
+        self.assertEqual(list(self.fb._pending_pixels()), [(3, 4, 0x444444)])
+
+    def test_out_of_screen_points_are_dropped(self):
+        self.fb.draw_point(-1, 0, 0x111111)
+        self.fb.draw_point(0, -1, 0x111111)
+        self.fb.draw_point(self.width, 0, 0x111111)
+        self.fb.draw_point(0, self.height, 0x111111)
+        self.assertEqual(list(self.fb._pending_pixels()), [])
+
+        self.fb.fill_rect(self.width - 1, self.height - 1, 3, 3, 0x111111)
+        self.assertEqual(list(self.fb._pending_pixels()), [(self.width - 1, self.height - 1, 0x111111)])
+
+    def test_full_screen_draw_rect_resets_pending_pixels(self):
+        self.fb.draw_point(3, 4, 0x111111)
+        events = self.fb.draw_rect(0, 0, self.width, self.height, 0x222222)
+        self.assertEqual(len(events), 1)
+        self.assertTrue(events[0].clear)
+        self.assertEqual(list(self.fb._pending_pixels()), [])
+        self.assertTrue(self.fb.draw_default_color)
+        self.assertEqual(self.fb.default_color, 0x222222)
+
+        # Pixels drawn after the reset are tracked again
+        self.fb.draw_point(3, 4, 0x333333)
+        self.assertEqual(list(self.fb._pending_pixels()), [(3, 4, 0x333333)])
+
+    def test_update_screenshot_keeps_pending_pixels(self):
+        self.fb.draw_point(1, 0, 0x123456)
+        self.fb.update_screenshot()
+        _, data = self.fb.take_screenshot()
+        self.assertEqual(data[:6], bytes.fromhex('000000123456'))
+
+    def test_take_dirty_rect_returns_bbox_then_none(self):
+        self.assertIsNone(self.fb.take_dirty_rect())
+        self.fb.draw_point(5, 7, 0x111111)
+        self.fb.draw_horizontal_line(2, 9, 2, 0x111111)
+        self.assertEqual(self.fb.take_dirty_rect(), (2, 7, 4, 3))
+        self.assertIsNone(self.fb.take_dirty_rect())
+
+    def test_flush_updates_screenshot_and_drops_pixels(self):
+        self.fb.draw_point(1, 0, 0x123456)
+        self.fb.flush()
+        self.assertEqual(list(self.fb._pending_pixels()), [])
+        _, data = self.fb.take_screenshot()
+        self.assertEqual(data[:6], bytes.fromhex('000000123456'))
+
+        # Flushed pixels may be drawn again
+        self.fb.draw_point(1, 0, 0x654321)
+        self.assertEqual(list(self.fb._pending_pixels()), [(1, 0, 0x654321)])
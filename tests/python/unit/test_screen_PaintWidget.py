@@ -0,0 +1,44 @@
+import os
+from unittest import TestCase
+
+from PyQt5.QtGui import QImage
+from PyQt5.QtWidgets import QApplication
+
+from speculos.mcu.display import FrameBuffer
+from speculos.mcu.screen import PaintWidget1x, PaintWidgetNx
+
+
+class TestPaintWidget(TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        os.environ.setdefault('QT_QPA_PLATFORM', 'offscreen')
+        cls.qapp = QApplication.instance() or QApplication([])
+
+    def check_drawn_pixel(self, widget, x, y, color):
+        ps = widget.pixel_size
+        self.assertEqual(widget.grab().toImage().pixel(x * ps, y * ps), 0xff000000 | color)
+        _, data = widget.take_screenshot()
+        pos = 3 * (y * widget._width + x)
+        self.assertEqual(data[pos:pos + 3], color.to_bytes(3, 'big'))
+
+    def test_nano_backing_image_is_indexed(self):
+        for model, widget_class, pixel_size in (('nanos', PaintWidget1x, 1), ('nanox', PaintWidgetNx, 2)):
+            with self.subTest(model=model):
+                widget = widget_class(None, model, pixel_size)
+                widget.resize(widget._width * pixel_size, widget._height * pixel_size)
+                self.assertEqual(widget._image.format(), QImage.Format_Indexed8)
+
+                widget.draw_point(1, 2, 0xffffff)
+                widget.update()
+                self.check_drawn_pixel(widget, 1, 2, FrameBuffer.COLORS[model])
+                self.check_drawn_pixel(widget, 0, 0, 0x000000)
+
+    def test_stax_backing_image_is_rgb32(self):
+        widget = PaintWidget1x(None, 'stax', 1)
+        widget.resize(widget._width, widget._height)
+        self.assertEqual(widget._image.format(), QImage.Format_RGB32)
+
+        widget.draw_point(1, 2, 0x123456)
+        widget.update()
+        self.check_drawn_pixel(widget, 1, 2, 0x123456)
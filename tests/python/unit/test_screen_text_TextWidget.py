@@ -0,0 +1,53 @@
+from types import SimpleNamespace
+from unittest import TestCase, mock
+
+from speculos.mcu.screen_text import TextWidget
+from speculos.mcu.struct import MODELS
+
+
+class TestTextWidget(TestCase):
+
+    def setUp(self):
+        # No terminal here: curses, and the foreground check made on stdin, are faked
+        for name in ('curses', 'os', 'sys'):
+            patcher = mock.patch(f'speculos.mcu.screen_text.{name}')
+            module = patcher.start()
+            self.addCleanup(patcher.stop)
+            if name == 'curses':
+                self.stdscr = module.initscr.return_value
+            elif name == 'os':
+                module.tcgetpgrp.return_value = module.getpgrp.return_value
+        self.width, self.height = MODELS['nanos'].screen_size
+        self.widget = TextWidget(SimpleNamespace(width=self.width, height=self.height), 'nanos')
+
+    def test_draw_lights_pixels(self):
+        self.widget.draw_point(1, 2, 0xffffff)
+        self.assertTrue(self.widget.update())
+        self.assertEqual(self.widget.get_pixel(1, 2), 1)
+        self.assertEqual(sum(self.widget.screen), 1)
+        self.assertFalse(self.widget.has_pending_pixels)
+        self.stdscr.refresh.assert_called_once()
+
+    def test_unchanged_screen_is_not_redrawn(self):
+        self.widget.draw_point(1, 2, 0xffffff)
+        self.widget.update()
+        self.stdscr.refresh.reset_mock()
+
+        self.widget.draw_point(1, 2, 0xffffff)
+        self.widget.draw_point(3, 4, 0x000000)
+        self.assertFalse(self.widget.update())
+        self.stdscr.refresh.assert_not_called()
+
+    def test_clear_turns_off_all_pixels(self):
+        screen = self.widget.screen
+        self.widget.draw_horizontal_line(0, 0, 4, 0xffffff)
+        self.widget.update()
+
+        self.widget.draw_rect(0, 0, self.width, self.height, 0x000000)
+        self.assertTrue(self.widget.update())
+        self.assertFalse(any(self.widget.screen))
+        self.assertIs(self.widget.screen, screen)
+
+        # Clearing an already blank screen changes nothing
+        self.widget.draw_rect(0, 0, self.width, self.height, 0x000000)
+        self.assertFalse(self.widget.update())
@@ -0,0 +1,27 @@
+from array import array
+from unittest import TestCase
+
+from speculos.mcu.vnc import VNC
+
+
+def encode_pixel(x: int, y: int, color: int) -> bytes:
+    # Per-pixel draw event, as expected by vnc_server
+    return bytes([y & 0xff, (y >> 8) & 0xff,
+                  x & 0xff, (x >> 8) & 0xff,
+                  color & 0xff, (color >> 8) & 0xff, (color >> 16) & 0xff, (color >> 24) & 0xff,
+                  0x0a])
+
+
+class TestVNC(TestCase):
+
+    def test_encode_matches_per_pixel_encoding(self):
+        pixels = [(0, 0, 0x000000), (1, 5, 0x123456), (300, 2, 0xdddddd), (7, 600, 0xffffff), (479, 671, 0xff5555)]
+        xs = array('H', [x for x, _, _ in pixels])
+        ys = array('H', [y for _, y, _ in pixels])
+        colors = array('I', [color for _, _, color in pixels])
+
+        expected = b''.join(encode_pixel(x, y, color) for x, y, color in pixels)
+        self.assertEqual(bytes(VNC._encode(xs, ys, colors)), expected)
+
+    def test_encode_no_pixel(self):
+        self.assertEqual(VNC._encode(array('H'), array('H'), array('I')), bytearray())